@@ -1,5 +1,7 @@
 """Class to hold all thermostat accessories."""
+from functools import partial
 import logging
+from types import MappingProxyType
 
 from pyhap.const import CATEGORY_THERMOSTAT
 
@@ -40,6 +42,7 @@ from homeassistant.components.climate.const import (
     SUPPORT_TARGET_TEMPERATURE_RANGE,
 )
 from homeassistant.components.water_heater import (
+    ATTR_CURRENT_TEMPERATURE as ATTR_CURRENT_TEMPERATURE_WATER_HEATER,
     DOMAIN as DOMAIN_WATER_HEATER,
     SERVICE_SET_TEMPERATURE as SERVICE_SET_TEMPERATURE_WATER_HEATER,
 )
@@ -85,7 +88,7 @@ HC_HEAT_COOL_AUTO = 3
 HC_MIN_TEMP = 10
 HC_MAX_TEMP = 38
 
-UNIT_HOMEKIT_TO_HASS = {c: s for s, c in UNIT_HASS_TO_HOMEKIT.items()}
+UNIT_HOMEKIT_TO_HASS = MappingProxyType({0: TEMP_CELSIUS, 1: TEMP_FAHRENHEIT})
 HC_HASS_TO_HOMEKIT = {
     HVAC_MODE_OFF: HC_HEAT_COOL_OFF,
     HVAC_MODE_HEAT: HC_HEAT_COOL_HEAT,
@@ -95,7 +98,15 @@ HC_HASS_TO_HOMEKIT = {
     HVAC_MODE_DRY: HC_HEAT_COOL_COOL,
     HVAC_MODE_FAN_ONLY: HC_HEAT_COOL_COOL,
 }
-HC_HOMEKIT_TO_HASS = {c: s for s, c in HC_HASS_TO_HOMEKIT.items()}
+HC_HOMEKIT_TO_HASS = MappingProxyType(
+    {
+        HC_HEAT_COOL_OFF: HVAC_MODE_OFF,
+        HC_HEAT_COOL_HEAT: HVAC_MODE_HEAT,
+        HC_HEAT_COOL_COOL: HVAC_MODE_COOL,
+        HC_HEAT_COOL_AUTO: HVAC_MODE_HEAT_COOL,
+    }
+)
+HC_COOL_FALLBACK_MODES = frozenset((HVAC_MODE_DRY, HVAC_MODE_FAN_ONLY))
 
 HC_HASS_TO_HOMEKIT_ACTION = {
     CURRENT_HVAC_OFF: HC_HEAT_COOL_OFF,
@@ -109,15 +120,49 @@ HC_HASS_TO_HOMEKIT_ACTION = {
 HEAT_COOL_DEADBAND = 5
 
 
+def _set_numeric_char(char, value, convert=None):
+    """Set a characteristic from a numeric state value if it changed."""
+    if not isinstance(value, (int, float)):
+        return
+    if convert is not None:
+        value = convert(value)
+    if char.value != value:
+        char.set_value(value)
+
+
 @TYPES.register("Thermostat")
 class Thermostat(HomeAccessory):
     """Generate a Thermostat accessory for a climate."""
 
+    __slots__ = [
+        "_unit",
+        "_temperature_to_homekit",
+        "_temperature_to_states",
+        "chars",
+        "hc_homekit_to_hass",
+        "char_current_heat_cool",
+        "char_target_heat_cool",
+        "char_current_temp",
+        "char_target_temp",
+        "char_display_units",
+        "char_cooling_thresh_temp",
+        "char_heating_thresh_temp",
+        "char_target_humidity",
+        "char_current_humidity",
+        "_temperature_range",
+        "_last_state",
+    ]
+
     def __init__(self, *args):
         """Initialize a Thermostat accessory object."""
         super().__init__(*args, category=CATEGORY_THERMOSTAT)
         self._unit = self.hass.config.units.temperature_unit
-        min_temp, max_temp = self.get_temperature_range()
+        self._temperature_to_homekit = partial(temperature_to_homekit, unit=self._unit)
+        self._temperature_to_states = partial(temperature_to_states, unit=self._unit)
+        state = self.hass.states.get(self.entity_id)
+        self._temperature_range = None
+        self._last_state = None
+        min_temp, max_temp = self.get_temperature_range(state.attributes)
 
         # Homekit only supports 10-38, overwriting
         # the max to appears to work, but less than 10 causes
@@ -125,13 +170,10 @@ class Thermostat(HomeAccessory):
         hc_min_temp = max(min_temp, HC_MIN_TEMP)
         hc_max_temp = max_temp
 
-        min_humidity = self.hass.states.get(self.entity_id).attributes.get(
-            ATTR_MIN_HUMIDITY, DEFAULT_MIN_HUMIDITY
-        )
+        min_humidity = state.attributes.get(ATTR_MIN_HUMIDITY, DEFAULT_MIN_HUMIDITY)
 
         # Add additional characteristics if auto mode is supported
         self.chars = []
-        state = self.hass.states.get(self.entity_id)
         features = state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
 
         if features & SUPPORT_TARGET_TEMPERATURE_RANGE:
@@ -171,21 +213,22 @@ class Thermostat(HomeAccessory):
         # the Home Assistant spec
         #
         # HVAC_MODE_HEAT_COOL: The device supports heating/cooling to a range
-        self.hc_homekit_to_hass = {
-            c: s
-            for s, c in HC_HASS_TO_HOMEKIT.items()
+        hc_modes = frozenset(hc_modes)
+        has_heat_cool = HVAC_MODE_HEAT_COOL in hc_modes
+        has_cool = HVAC_MODE_COOL in hc_modes
+        self.hc_homekit_to_hass = {}
+        hc_valid_values = {}
+        for hass_mode, homekit_mode in HC_HASS_TO_HOMEKIT.items():
             if (
-                s in hc_modes
-                and not (
-                    (s == HVAC_MODE_AUTO and HVAC_MODE_HEAT_COOL in hc_modes)
-                    or (
-                        s in (HVAC_MODE_DRY, HVAC_MODE_FAN_ONLY)
-                        and HVAC_MODE_COOL in hc_modes
-                    )
-                )
-            )
-        }
-        hc_valid_values = {k: v for v, k in self.hc_homekit_to_hass.items()}
+                hass_mode not in hc_modes
+                or (hass_mode == HVAC_MODE_AUTO and has_heat_cool)
+                or (hass_mode in HC_COOL_FALLBACK_MODES and has_cool)
+            ):
+                continue
+            # Keep a single Home Assistant mode per HomeKit mode
+            hc_valid_values.pop(self.hc_homekit_to_hass.get(homekit_mode), None)
+            self.hc_homekit_to_hass[homekit_mode] = hass_mode
+            hc_valid_values[hass_mode] = homekit_mode
 
         self.char_target_heat_cool = serv_thermostat.configure_char(
             CHAR_TARGET_HEATING_COOLING, valid_values=hc_valid_values,
@@ -253,22 +296,16 @@ class Thermostat(HomeAccessory):
 
         serv_thermostat.setter_callback = self._set_chars
 
-    def _temperature_to_homekit(self, temp):
-        return temperature_to_homekit(temp, self._unit)
-
-    def _temperature_to_states(self, temp):
-        return temperature_to_states(temp, self._unit)
-
     def _set_chars(self, char_values):
         _LOGGER.debug("Thermostat _set_chars: %s", char_values)
         events = []
-        params = {}
         service = None
-        state = self.hass.states.get(self.entity_id)
+        entity_id = self.entity_id
+        params = {ATTR_ENTITY_ID: entity_id}
+        state = self.hass.states.get(entity_id)
         features = state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
 
-        hvac_mode = self.hass.states.get(self.entity_id).state
-        homekit_hvac_mode = HC_HASS_TO_HOMEKIT[hvac_mode]
+        homekit_hvac_mode = HC_HASS_TO_HOMEKIT.get(state.state, HC_HEAT_COOL_OFF)
 
         if CHAR_TARGET_HEATING_COOLING in char_values:
             # Homekit will reset the mode when VIEWING the temp
@@ -278,10 +315,12 @@ class Thermostat(HomeAccessory):
                 hass_value = self.hc_homekit_to_hass[
                     char_values[CHAR_TARGET_HEATING_COOLING]
                 ]
-                params = {ATTR_HVAC_MODE: hass_value}
+                params[ATTR_HVAC_MODE] = hass_value
                 events.append(
                     f"{CHAR_TARGET_HEATING_COOLING} to {char_values[CHAR_TARGET_HEATING_COOLING]}"
                 )
+            elif len(char_values) == 1:
+                return
 
         if CHAR_TARGET_TEMPERATURE in char_values:
             hc_target_temp = char_values[CHAR_TARGET_TEMPERATURE]
@@ -315,40 +354,34 @@ class Thermostat(HomeAccessory):
             or CHAR_COOLING_THRESHOLD_TEMPERATURE in char_values
         ):
             service = SERVICE_SET_TEMPERATURE_THERMOSTAT
-            high = self.char_cooling_thresh_temp.value
-            low = self.char_heating_thresh_temp.value
-            min_temp, max_temp = self.get_temperature_range()
+            high = char_values.get(
+                CHAR_COOLING_THRESHOLD_TEMPERATURE, self.char_cooling_thresh_temp.value
+            )
+            low = char_values.get(
+                CHAR_HEATING_THRESHOLD_TEMPERATURE, self.char_heating_thresh_temp.value
+            )
             if CHAR_COOLING_THRESHOLD_TEMPERATURE in char_values:
-                events.append(
-                    f"{CHAR_COOLING_THRESHOLD_TEMPERATURE} to {char_values[CHAR_COOLING_THRESHOLD_TEMPERATURE]}°C"
-                )
-                high = char_values[CHAR_COOLING_THRESHOLD_TEMPERATURE]
-                # If the device doesn't support TARGET_TEMPATURE
-                # this can happen
-                if high < low:
-                    low = high - HEAT_COOL_DEADBAND
-            if CHAR_HEATING_THRESHOLD_TEMPERATURE in char_values:
-                events.append(
-                    f"{CHAR_HEATING_THRESHOLD_TEMPERATURE} to {char_values[CHAR_HEATING_THRESHOLD_TEMPERATURE]}°C"
-                )
-                low = char_values[CHAR_HEATING_THRESHOLD_TEMPERATURE]
-                # If the device doesn't support TARGET_TEMPATURE
-                # this can happen
-                if low > high:
+                events.append(f"{CHAR_COOLING_THRESHOLD_TEMPERATURE} to {high}°C")
+            heating_changed = CHAR_HEATING_THRESHOLD_TEMPERATURE in char_values
+            if heating_changed:
+                events.append(f"{CHAR_HEATING_THRESHOLD_TEMPERATURE} to {low}°C")
+
+            # If the device doesn't support TARGET_TEMPATURE
+            # this can happen
+            if high < low:
+                if heating_changed:
                     high = low + HEAT_COOL_DEADBAND
+                else:
+                    low = high - HEAT_COOL_DEADBAND
 
+            min_temp, max_temp = self.get_temperature_range(state.attributes)
             high = min(high, max_temp)
             low = max(low, min_temp)
 
-            params.update(
-                {
-                    ATTR_TARGET_TEMP_HIGH: self._temperature_to_states(high),
-                    ATTR_TARGET_TEMP_LOW: self._temperature_to_states(low),
-                }
-            )
+            params[ATTR_TARGET_TEMP_HIGH] = self._temperature_to_states(high)
+            params[ATTR_TARGET_TEMP_LOW] = self._temperature_to_states(low)
 
         if service:
-            params[ATTR_ENTITY_ID] = self.entity_id
             self.call_service(
                 DOMAIN_CLIMATE, service, params, ", ".join(events),
             )
@@ -356,119 +389,144 @@ class Thermostat(HomeAccessory):
         if CHAR_TARGET_HUMIDITY in char_values:
             self.set_target_humidity(char_values[CHAR_TARGET_HUMIDITY])
 
-    def get_temperature_range(self):
+    def get_temperature_range(self, attributes=None):
         """Return min and max temperature range."""
-        max_temp = self.hass.states.get(self.entity_id).attributes.get(ATTR_MAX_TEMP)
+        if attributes is None:
+            attributes = self.hass.states.get(self.entity_id).attributes
+        limits = (attributes.get(ATTR_MIN_TEMP), attributes.get(ATTR_MAX_TEMP))
+
+        # Cached limits and range are stored together so a single assignment
+        # replaces both
+        cached = self._temperature_range
+        if cached is not None and cached[0] == limits:
+            return cached[1]
+
+        min_temp, max_temp = limits
         max_temp = (
             self._temperature_to_homekit(max_temp) if max_temp else DEFAULT_MAX_TEMP
         )
         max_temp = round(max_temp * 2) / 2
 
-        min_temp = self.hass.states.get(self.entity_id).attributes.get(ATTR_MIN_TEMP)
         min_temp = (
             self._temperature_to_homekit(min_temp) if min_temp else DEFAULT_MIN_TEMP
         )
         min_temp = round(min_temp * 2) / 2
 
+        self._temperature_range = (limits, (min_temp, max_temp))
         return min_temp, max_temp
 
     def set_target_humidity(self, value):
         """Set target humidity to value if call came from HomeKit."""
-        _LOGGER.debug("%s: Set target humidity to %d", self.entity_id, value)
-        params = {ATTR_ENTITY_ID: self.entity_id, ATTR_HUMIDITY: value}
+        entity_id = self.entity_id
+        _LOGGER.debug("%s: Set target humidity to %d", entity_id, value)
+        params = {ATTR_ENTITY_ID: entity_id, ATTR_HUMIDITY: value}
         self.call_service(
             DOMAIN_CLIMATE, SERVICE_SET_HUMIDITY, params, f"{value}{UNIT_PERCENTAGE}"
         )
 
     def update_state(self, new_state):
         """Update thermostat state after state changed."""
-        features = new_state.attributes.get(ATTR_SUPPORTED_FEATURES, 0)
+        # Skip states that have already been processed
+        if new_state is self._last_state:
+            return
+        self._last_state = new_state
+
+        attributes = new_state.attributes
+        features = attributes.get(ATTR_SUPPORTED_FEATURES, 0)
 
         # Update target operation mode FIRST
-        hvac_mode = new_state.state
-        if hvac_mode and hvac_mode in HC_HASS_TO_HOMEKIT:
-            homekit_hvac_mode = HC_HASS_TO_HOMEKIT[hvac_mode]
-            if self.char_target_heat_cool.value != homekit_hvac_mode:
-                self.char_target_heat_cool.set_value(homekit_hvac_mode)
+        homekit_hvac_mode = HC_HASS_TO_HOMEKIT.get(new_state.state)
+        if homekit_hvac_mode is None:
+            homekit_hvac_mode = self.char_target_heat_cool.value
+        elif self.char_target_heat_cool.value != homekit_hvac_mode:
+            self.char_target_heat_cool.set_value(homekit_hvac_mode)
 
         # Set current operation mode for supported thermostats
-        hvac_action = new_state.attributes.get(ATTR_HVAC_ACTION)
-        if hvac_action:
-            homekit_hvac_action = HC_HASS_TO_HOMEKIT_ACTION[hvac_action]
+        homekit_hvac_action = HC_HASS_TO_HOMEKIT_ACTION.get(
+            attributes.get(ATTR_HVAC_ACTION)
+        )
+        if homekit_hvac_action is not None:
             if self.char_current_heat_cool.value != homekit_hvac_action:
                 self.char_current_heat_cool.set_value(homekit_hvac_action)
 
         # Update current temperature
-        current_temp = new_state.attributes.get(ATTR_CURRENT_TEMPERATURE)
-        if isinstance(current_temp, (int, float)):
-            current_temp = self._temperature_to_homekit(current_temp)
-            if self.char_current_temp.value != current_temp:
-                self.char_current_temp.set_value(current_temp)
-
-        # Update current humidity
-        if CHAR_CURRENT_HUMIDITY in self.chars:
-            current_humdity = new_state.attributes.get(ATTR_CURRENT_HUMIDITY)
-            if isinstance(current_humdity, (int, float)):
-                if self.char_current_humidity.value != current_humdity:
-                    self.char_current_humidity.set_value(current_humdity)
-
-        # Update target humidity
-        if CHAR_TARGET_HUMIDITY in self.chars:
-            target_humdity = new_state.attributes.get(ATTR_HUMIDITY)
-            if isinstance(target_humdity, (int, float)):
-                if self.char_target_humidity.value != target_humdity:
-                    self.char_target_humidity.set_value(target_humdity)
+        _set_numeric_char(
+            self.char_current_temp,
+            attributes.get(ATTR_CURRENT_TEMPERATURE),
+            self._temperature_to_homekit,
+        )
+
+        # Update current humidity if characteristic exists
+        if self.char_current_humidity:
+            _set_numeric_char(
+                self.char_current_humidity, attributes.get(ATTR_CURRENT_HUMIDITY)
+            )
+
+        # Update target humidity if characteristic exists
+        if self.char_target_humidity:
+            _set_numeric_char(self.char_target_humidity, attributes.get(ATTR_HUMIDITY))
 
         # Update cooling threshold temperature if characteristic exists
         if self.char_cooling_thresh_temp:
-            cooling_thresh = new_state.attributes.get(ATTR_TARGET_TEMP_HIGH)
-            if isinstance(cooling_thresh, (int, float)):
-                cooling_thresh = self._temperature_to_homekit(cooling_thresh)
-                if self.char_heating_thresh_temp.value != cooling_thresh:
-                    self.char_cooling_thresh_temp.set_value(cooling_thresh)
+            _set_numeric_char(
+                self.char_cooling_thresh_temp,
+                attributes.get(ATTR_TARGET_TEMP_HIGH),
+                self._temperature_to_homekit,
+            )
 
         # Update heating threshold temperature if characteristic exists
         if self.char_heating_thresh_temp:
-            heating_thresh = new_state.attributes.get(ATTR_TARGET_TEMP_LOW)
-            if isinstance(heating_thresh, (int, float)):
-                heating_thresh = self._temperature_to_homekit(heating_thresh)
-                if self.char_heating_thresh_temp.value != heating_thresh:
-                    self.char_heating_thresh_temp.set_value(heating_thresh)
+            _set_numeric_char(
+                self.char_heating_thresh_temp,
+                attributes.get(ATTR_TARGET_TEMP_LOW),
+                self._temperature_to_homekit,
+            )
 
         # Update target temperature
-        target_temp = new_state.attributes.get(ATTR_TEMPERATURE)
+        target_temp = attributes.get(ATTR_TEMPERATURE)
         if isinstance(target_temp, (int, float)):
             target_temp = self._temperature_to_homekit(target_temp)
         elif features & SUPPORT_TARGET_TEMPERATURE_RANGE:
             # Homekit expects a target temperature
             # even if the device does not support it
-            hc_hvac_mode = self.char_target_heat_cool.value
-            if hc_hvac_mode == HC_HEAT_COOL_HEAT:
+            if homekit_hvac_mode == HC_HEAT_COOL_HEAT:
                 target_temp = self._temperature_to_homekit(
-                    new_state.attributes.get(ATTR_TARGET_TEMP_LOW)
+                    attributes.get(ATTR_TARGET_TEMP_LOW)
                 )
-            elif hc_hvac_mode == HC_HEAT_COOL_COOL:
+            elif homekit_hvac_mode == HC_HEAT_COOL_COOL:
                 target_temp = self._temperature_to_homekit(
-                    new_state.attributes.get(ATTR_TARGET_TEMP_HIGH)
+                    attributes.get(ATTR_TARGET_TEMP_HIGH)
                 )
         if target_temp and self.char_target_temp.value != target_temp:
             self.char_target_temp.set_value(target_temp)
 
         # Update display units
-        if self._unit and self._unit in UNIT_HASS_TO_HOMEKIT:
-            unit = UNIT_HASS_TO_HOMEKIT[self._unit]
-            if self.char_display_units.value != unit:
-                self.char_display_units.set_value(unit)
+        unit = UNIT_HASS_TO_HOMEKIT.get(self._unit)
+        if unit is not None and self.char_display_units.value != unit:
+            self.char_display_units.set_value(unit)
 
 
 @TYPES.register("WaterHeater")
 class WaterHeater(HomeAccessory):
     """Generate a WaterHeater accessory for a water_heater."""
 
+    __slots__ = [
+        "_unit",
+        "_temperature_to_homekit",
+        "_temperature_to_states",
+        "char_current_heat_cool",
+        "char_target_heat_cool",
+        "char_current_temp",
+        "char_target_temp",
+        "char_display_units",
+    ]
+
     def __init__(self, *args):
         """Initialize a WaterHeater accessory object."""
         super().__init__(*args, category=CATEGORY_THERMOSTAT)
         self._unit = self.hass.config.units.temperature_unit
+        self._temperature_to_homekit = partial(temperature_to_homekit, unit=self._unit)
+        self._temperature_to_states = partial(temperature_to_states, unit=self._unit)
         min_temp, max_temp = self.get_temperature_range()
 
         serv_thermostat = self.add_preload_service(SERV_THERMOSTAT)
@@ -505,17 +563,18 @@ class WaterHeater(HomeAccessory):
 
     def get_temperature_range(self):
         """Return min and max temperature range."""
-        max_temp = self.hass.states.get(self.entity_id).attributes.get(ATTR_MAX_TEMP)
+        attributes = self.hass.states.get(self.entity_id).attributes
+        max_temp = attributes.get(ATTR_MAX_TEMP)
         max_temp = (
-            temperature_to_homekit(max_temp, self._unit)
+            self._temperature_to_homekit(max_temp)
             if max_temp
             else DEFAULT_MAX_TEMP_WATER_HEATER
         )
         max_temp = round(max_temp * 2) / 2
 
-        min_temp = self.hass.states.get(self.entity_id).attributes.get(ATTR_MIN_TEMP)
+        min_temp = attributes.get(ATTR_MIN_TEMP)
         min_temp = (
-            temperature_to_homekit(min_temp, self._unit)
+            self._temperature_to_homekit(min_temp)
             if min_temp
             else DEFAULT_MIN_TEMP_WATER_HEATER
         )
@@ -533,9 +592,10 @@ class WaterHeater(HomeAccessory):
 
     def set_target_temperature(self, value):
         """Set target temperature to value if call came from HomeKit."""
-        _LOGGER.debug("%s: Set target temperature to %.1f°C", self.entity_id, value)
-        temperature = temperature_to_states(value, self._unit)
-        params = {ATTR_ENTITY_ID: self.entity_id, ATTR_TEMPERATURE: temperature}
+        entity_id = self.entity_id
+        _LOGGER.debug("%s: Set target temperature to %.1f°C", entity_id, value)
+        temperature = self._temperature_to_states(value)
+        params = {ATTR_ENTITY_ID: entity_id, ATTR_TEMPERATURE: temperature}
         self.call_service(
             DOMAIN_WATER_HEATER,
             SERVICE_SET_TEMPERATURE_WATER_HEATER,
@@ -545,18 +605,26 @@ class WaterHeater(HomeAccessory):
 
     def update_state(self, new_state):
         """Update water_heater state after state change."""
-        # Update current and target temperature
-        temperature = new_state.attributes.get(ATTR_TEMPERATURE)
-        if isinstance(temperature, (int, float)):
-            temperature = temperature_to_homekit(temperature, self._unit)
-            if temperature != self.char_current_temp.value:
-                self.char_target_temp.set_value(temperature)
+        attributes = new_state.attributes
+
+        # Update current temperature
+        _set_numeric_char(
+            self.char_current_temp,
+            attributes.get(ATTR_CURRENT_TEMPERATURE_WATER_HEATER),
+            self._temperature_to_homekit,
+        )
+
+        # Update target temperature
+        _set_numeric_char(
+            self.char_target_temp,
+            attributes.get(ATTR_TEMPERATURE),
+            self._temperature_to_homekit,
+        )
 
         # Update display units
-        if self._unit and self._unit in UNIT_HASS_TO_HOMEKIT:
-            unit = UNIT_HASS_TO_HOMEKIT[self._unit]
-            if self.char_display_units.value != unit:
-                self.char_display_units.set_value(unit)
+        unit = UNIT_HASS_TO_HOMEKIT.get(self._unit)
+        if unit is not None and self.char_display_units.value != unit:
+            self.char_display_units.set_value(unit)
 
         # Update target operation mode
         operation_mode = new_state.state
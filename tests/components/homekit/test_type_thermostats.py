@@ -51,11 +51,13 @@ from homeassistant.const import (
     ATTR_TEMPERATURE,
     CONF_TEMPERATURE_UNIT,
     EVENT_HOMEASSISTANT_START,
+    STATE_UNAVAILABLE,
     TEMP_CELSIUS,
     TEMP_FAHRENHEIT,
 )
-from homeassistant.core import CoreState
+from homeassistant.core import CoreState, State
 from homeassistant.helpers import entity_registry
+import homeassistant.util.dt as dt_util
 
 from tests.common import async_mock_service
 from tests.components.homekit.common import patch_debounce
@@ -276,6 +278,20 @@ async def test_thermostat(hass, hk_driver, cls, events):
     assert acc.char_current_temp.value == 22.0
     assert acc.char_display_units.value == 0
 
+    hass.states.async_set(
+        entity_id,
+        HVAC_MODE_DRY,
+        {
+            ATTR_SUPPORTED_FEATURES: SUPPORT_TARGET_TEMPERATURE,
+            ATTR_TEMPERATURE: 22.0,
+            ATTR_CURRENT_TEMPERATURE: 23.0,
+            ATTR_HVAC_ACTION: "not_a_known_action",
+        },
+    )
+    await hass.async_block_till_done()
+    assert acc.char_current_heat_cool.value == 2
+    assert acc.char_current_temp.value == 23.0
+
     # Set from HomeKit
     call_set_temperature = async_mock_service(hass, DOMAIN_CLIMATE, "set_temperature")
     call_set_hvac_mode = async_mock_service(hass, DOMAIN_CLIMATE, "set_hvac_mode")
@@ -443,6 +459,21 @@ async def test_thermostat_auto(hass, hk_driver, cls, events):
     assert acc.char_current_temp.value == 21.0
     assert acc.char_display_units.value == 0
 
+    # Cooling threshold equal to the current heating threshold
+    hass.states.async_set(
+        entity_id,
+        HVAC_MODE_AUTO,
+        {
+            ATTR_TARGET_TEMP_HIGH: 19.0,
+            ATTR_TARGET_TEMP_LOW: 19.0,
+            ATTR_CURRENT_TEMPERATURE: 21.0,
+            ATTR_HVAC_ACTION: CURRENT_HVAC_IDLE,
+        },
+    )
+    await hass.async_block_till_done()
+    assert acc.char_heating_thresh_temp.value == 19.0
+    assert acc.char_cooling_thresh_temp.value == 19.0
+
     # Set from HomeKit
     call_set_temperature = async_mock_service(hass, DOMAIN_CLIMATE, "set_temperature")
 
@@ -783,14 +814,52 @@ async def test_thermostat_get_temperature_range(hass, hk_driver, cls):
     await hass.async_block_till_done()
     assert acc.get_temperature_range() == (20, 25)
 
-    acc._unit = TEMP_FAHRENHEIT
+    hass.states.async_set(
+        entity_id, HVAC_MODE_OFF, {ATTR_MIN_TEMP: 18, ATTR_MAX_TEMP: 28}
+    )
+    await hass.async_block_till_done()
+    assert acc.get_temperature_range() == (18, 28)
+
     hass.states.async_set(
         entity_id, HVAC_MODE_OFF, {ATTR_MIN_TEMP: 60, ATTR_MAX_TEMP: 70}
     )
     await hass.async_block_till_done()
+    with patch.object(hass.config.units, CONF_TEMPERATURE_UNIT, new=TEMP_FAHRENHEIT):
+        acc = cls.thermostat(hass, hk_driver, "Climate", entity_id, 2, None)
     assert acc.get_temperature_range() == (15.5, 21.0)
 
 
+async def test_thermostat_skips_processed_state(hass, hk_driver, cls):
+    """Test that an already processed state is not applied again."""
+    entity_id = "climate.test"
+
+    hass.states.async_set(entity_id, HVAC_MODE_HEAT, {ATTR_TEMPERATURE: 22.0})
+    await hass.async_block_till_done()
+    acc = cls.thermostat(hass, hk_driver, "Climate", entity_id, 1, None)
+    await acc.run_handler()
+    await hass.async_block_till_done()
+    assert acc.char_target_temp.value == 22.0
+
+    acc.char_target_temp.value = 20.0
+    acc.update_state(hass.states.get(entity_id))
+    assert acc.char_target_temp.value == 20.0
+
+    hass.states.async_set(entity_id, HVAC_MODE_HEAT, {ATTR_TEMPERATURE: 23.0})
+    await hass.async_block_till_done()
+    assert acc.char_target_temp.value == 23.0
+
+    # Distinct states sharing a timestamp are both applied
+    now = dt_util.utcnow()
+    acc.update_state(
+        State(entity_id, HVAC_MODE_HEAT, {ATTR_TEMPERATURE: 24.0}, now, now)
+    )
+    assert acc.char_target_temp.value == 24.0
+    acc.update_state(
+        State(entity_id, HVAC_MODE_HEAT, {ATTR_TEMPERATURE: 25.0}, now, now)
+    )
+    assert acc.char_target_temp.value == 25.0
+
+
 async def test_thermostat_temperature_step_whole(hass, hk_driver, cls):
     """Test climate device with single digit precision."""
     entity_id = "climate.test"
@@ -1231,6 +1300,50 @@ async def test_thermostat_without_target_temp_only_range(hass, hk_driver, cls, e
     assert events[-1].data[ATTR_VALUE] == "HeatingThresholdTemperature to 27.0°C"
 
 
+async def test_thermostat_set_hvac_mode_while_unavailable(hass, hk_driver, cls, events):
+    """Test setting the mode from HomeKit while the entity is unavailable."""
+    entity_id = "climate.test"
+
+    hass.states.async_set(
+        entity_id, HVAC_MODE_OFF, {ATTR_HVAC_MODES: [HVAC_MODE_HEAT, HVAC_MODE_OFF]}
+    )
+    await hass.async_block_till_done()
+    acc = cls.thermostat(hass, hk_driver, "Climate", entity_id, 1, None)
+    hk_driver.add_accessory(acc)
+
+    await acc.run_handler()
+    await hass.async_block_till_done()
+
+    hass.states.async_set(
+        entity_id,
+        STATE_UNAVAILABLE,
+        {ATTR_HVAC_MODES: [HVAC_MODE_HEAT, HVAC_MODE_OFF]},
+    )
+    await hass.async_block_till_done()
+    assert acc.char_target_heat_cool.value == 0
+
+    call_set_hvac_mode = async_mock_service(hass, DOMAIN_CLIMATE, "set_hvac_mode")
+    char_heat_cool_iid = acc.char_target_heat_cool.to_HAP()[HAP_REPR_IID]
+
+    hk_driver.set_characteristics(
+        {
+            HAP_REPR_CHARS: [
+                {
+                    HAP_REPR_AID: acc.aid,
+                    HAP_REPR_IID: char_heat_cool_iid,
+                    HAP_REPR_VALUE: 1,
+                },
+            ]
+        },
+        "mock_addr",
+    )
+    await hass.async_block_till_done()
+    assert call_set_hvac_mode
+    assert call_set_hvac_mode[0].data[ATTR_ENTITY_ID] == entity_id
+    assert call_set_hvac_mode[0].data[ATTR_HVAC_MODE] == HVAC_MODE_HEAT
+    assert len(events) == 1
+
+
 async def test_water_heater(hass, hk_driver, cls, events):
     """Test if accessory and HA are updated accordingly."""
     entity_id = "water_heater.test"
@@ -1261,11 +1374,15 @@ async def test_water_heater(hass, hk_driver, cls, events):
     hass.states.async_set(
         entity_id,
         HVAC_MODE_HEAT,
-        {ATTR_HVAC_MODE: HVAC_MODE_HEAT, ATTR_TEMPERATURE: 56.0},
+        {
+            ATTR_HVAC_MODE: HVAC_MODE_HEAT,
+            ATTR_TEMPERATURE: 56.0,
+            ATTR_CURRENT_TEMPERATURE: 52.0,
+        },
     )
     await hass.async_block_till_done()
     assert acc.char_target_temp.value == 56.0
-    assert acc.char_current_temp.value == 50.0
+    assert acc.char_current_temp.value == 52.0
     assert acc.char_target_heat_cool.value == 1
     assert acc.char_current_heat_cool.value == 1
     assert acc.char_display_units.value == 0
@@ -1316,10 +1433,14 @@ async def test_water_heater_fahrenheit(hass, hk_driver, cls, events):
     await acc.run_handler()
     await hass.async_block_till_done()
 
-    hass.states.async_set(entity_id, HVAC_MODE_HEAT, {ATTR_TEMPERATURE: 131})
+    hass.states.async_set(
+        entity_id,
+        HVAC_MODE_HEAT,
+        {ATTR_TEMPERATURE: 131, ATTR_CURRENT_TEMPERATURE: 113},
+    )
     await hass.async_block_till_done()
     assert acc.char_target_temp.value == 55.0
-    assert acc.char_current_temp.value == 50
+    assert acc.char_current_temp.value == 45.0
     assert acc.char_display_units.value == 1
 
     # Set from HomeKit
@@ -1343,7 +1464,7 @@ async def test_water_heater_get_temperature_range(hass, hk_driver, cls):
 
     hass.states.async_set(entity_id, HVAC_MODE_HEAT)
     await hass.async_block_till_done()
-    acc = cls.thermostat(hass, hk_driver, "WaterHeater", entity_id, 2, None)
+    acc = cls.water_heater(hass, hk_driver, "WaterHeater", entity_id, 2, None)
 
     hass.states.async_set(
         entity_id, HVAC_MODE_HEAT, {ATTR_MIN_TEMP: 20, ATTR_MAX_TEMP: 25}
@@ -1351,11 +1472,12 @@ async def test_water_heater_get_temperature_range(hass, hk_driver, cls):
     await hass.async_block_till_done()
     assert acc.get_temperature_range() == (20, 25)
 
-    acc._unit = TEMP_FAHRENHEIT
     hass.states.async_set(
         entity_id, HVAC_MODE_OFF, {ATTR_MIN_TEMP: 60, ATTR_MAX_TEMP: 70}
     )
     await hass.async_block_till_done()
+    with patch.object(hass.config.units, CONF_TEMPERATURE_UNIT, new=TEMP_FAHRENHEIT):
+        acc = cls.water_heater(hass, hk_driver, "WaterHeater", entity_id, 2, None)
     assert acc.get_temperature_range() == (15.5, 21.0)
 
 